@@ -0,0 +1 @@
+"""Pytest root configuration; keeps the project root importable from tests/."""
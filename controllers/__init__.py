@@ -1,6 +1,7 @@
 """Controllers package for HTTP request handling."""
 
 from controllers.email_controller import router as email_router
+from controllers.health import health_response
 
-__all__ = ["email_router"]
+__all__ = ["email_router", "health_response"]
 
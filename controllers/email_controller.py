@@ -1,25 +1,35 @@
 """Email controller for handling HTTP requests."""
 
+import time
 import logging
-from fastapi import APIRouter, HTTPException, status
-from models.email_models import EmailRequest, EmailResponse
+from dataclasses import asdict
+from functools import lru_cache
+from fastapi import APIRouter, Depends, HTTPException, status
+from controllers.health import health_response
+from models.email_models import EmailRequest, EmailResponse, HealthResponse
 from services.email_service import EmailService
+from services.deps import get_email_service
+from services.gmail_service import get_gmail_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["email"])
 
-# Initialize service (could be injected via dependency injection in production)
-email_service = EmailService()
+# Seconds an authentication status result is reused across probes
+AUTH_STATUS_TTL = 30
 
 
 @router.post("/send-email", response_model=EmailResponse, status_code=status.HTTP_200_OK)
-async def send_email(request: EmailRequest) -> EmailResponse:
+async def send_email(
+    request: EmailRequest,
+    email_service: EmailService = Depends(get_email_service)
+) -> EmailResponse:
     """
     Send an email via Gmail API.
     
     Args:
         request: EmailRequest with to_email, subject, body, and optional is_html
+        email_service: Shared email service instance
     
     Returns:
         EmailResponse with success status and message
@@ -28,58 +38,47 @@ async def send_email(request: EmailRequest) -> EmailResponse:
         HTTPException: If email sending fails
     """
     try:
-        result = email_service.send_email(
-            to_email=request.to_email,
-            subject=request.subject,
-            body=request.body,
-            is_html=request.is_html
-        )
+        result = await email_service.send_email(**request.model_dump(mode='json'))
         
-        if result['success']:
-            return EmailResponse(
-                success=True,
-                message=result['message'],
-                subject=request.subject,
-                message_id=result.get('message_id')
-            )
+        if result.success:
+            # Server-generated fields already have the right types, so skip re-validation
+            return EmailResponse.model_construct(**asdict(result), subject=request.subject)
         else:
-            logger.error(f"Email sending failed: {result['message']}")
+            logger.error("Email sending failed: %s", result.message)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=result['message']
+                detail=result.message
             )
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in send_email endpoint: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in send_email endpoint: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error sending email: {str(e)}"
         )
 
 
-@router.get("/health")
+@router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint for email service."""
-    return {
-        "status": "healthy",
-        "service": "email"
-    }
+    return health_response("email")
 
 
 @router.get("/auth/status")
-async def auth_status():
+async def auth_status() -> dict:
     """
     Check Gmail authentication status and provide diagnostic information.
     
     Returns:
         Dictionary with authentication status and setup instructions
     """
-    from services.gmail_service import GmailService
-    
-    gmail_service = GmailService()
-    status = gmail_service.check_authentication_status()
-    
-    return status
+    # A cache miss reads token files, so run it on the Gmail pool instead of the event loop
+    return await get_gmail_service()._run_blocking(_cached_auth_status, int(time.time() // AUTH_STATUS_TTL))
+
 
+@lru_cache(maxsize=1)
+def _cached_auth_status(bucket: int) -> dict:
+    """Compute the authentication status once per AUTH_STATUS_TTL window (keyed by bucket)."""
+    return get_gmail_service().check_authentication_status()
@@ -0,0 +1,26 @@
+"""Pre-serialized health check responses shared by the app and API routers."""
+
+from functools import lru_cache
+from fastapi import Response
+from models.email_models import HealthResponse
+
+
+@lru_cache(maxsize=None)
+def _health_body(service: str) -> bytes:
+    """Serialize the static health payload for a service once."""
+    return HealthResponse(status="healthy", service=service).model_dump_json().encode()
+
+
+def health_response(service: str) -> Response:
+    """
+    Build a health check response from the cached payload.
+    
+    Routes returning this should declare response_model=HealthResponse so the schema stays in OpenAPI.
+    
+    Args:
+        service: Service name reported in the payload
+    
+    Returns:
+        JSON response with the health payload
+    """
+    return Response(content=_health_body(service), media_type="application/json")
@@ -5,14 +5,23 @@ A FastAPI application that provides HTTP API and MCP protocol endpoints
 for sending emails via Gmail API.
 """
 
+import os
 import logging
+import sys
+import httpx
 import uvicorn
+import redis.asyncio as redis
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mcp.server.fastmcp import FastMCP
 from controllers.email_controller import router as email_router
+from controllers.health import health_response
+from models.email_models import HealthResponse
 from mcp_integration.tools import setup_mcp_tools
+from services.deps import get_email_service
+from services.gmail_service import get_gmail_service
 
 # Configure logging
 logging.basicConfig(
@@ -21,25 +30,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# uvloop does not support Windows (uvicorn[standard] skips installing it there)
+EVENT_LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+
+# Threads for blocking Gmail credential I/O, bounded so it cannot starve the default pool
+GMAIL_POOL_SIZE = min(32, (os.cpu_count() or 1) * 4)
+
+# Set ENABLE_MCP=0 for HTTP-only deployments to skip the MCP server and its session manager
+ENABLE_MCP = os.getenv("ENABLE_MCP", "1") == "1"
+
+# Short Redis timeouts so an unreachable token cache falls back to token.json quickly
+REDIS_TIMEOUT = 1.0
+
 # Global MCP instance to manage lifespan
 _mcp_instance: FastMCP | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan context manager for FastAPI app. Manages the MCP session manager lifecycle."""
+    """
+    Lifespan context manager for FastAPI app.
+    
+    Manages the shared HTTP client, thread pool and optional Redis token cache used
+    for Gmail API calls, the outbound email batcher and the MCP session manager lifecycle.
+    """
     global _mcp_instance
     
-    if _mcp_instance:
-        session_manager = _mcp_instance.session_manager
-        if session_manager:
-            async with session_manager.run():
-                logger.info("MCP session manager started")
-                yield
-                logger.info("MCP session manager stopped")
-            return
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=300),
+        timeout=30,
+    )
+    pool = ThreadPoolExecutor(max_workers=GMAIL_POOL_SIZE, thread_name_prefix="gmail")
+    app.state.pool = pool
+    redis_url = os.getenv("REDIS_URL")
+    token_cache = redis.from_url(
+        redis_url, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT
+    ) if redis_url else None
+    app.state.redis = token_cache
     
-    yield
+    async with http_client:
+        app.state.http = http_client
+        gmail_service = get_gmail_service()
+        gmail_service.http_client = http_client
+        gmail_service.executor = pool
+        gmail_service.token_cache = token_cache
+        logger.info("Gmail HTTP client started")
+        
+        email_service = get_email_service()
+        await email_service.start()
+        try:
+            if ENABLE_MCP and _mcp_instance:
+                session_manager = _mcp_instance.session_manager
+                if session_manager:
+                    async with session_manager.run():
+                        logger.info("MCP session manager started")
+                        yield
+                        logger.info("MCP session manager stopped")
+                    return
+            
+            yield
+        finally:
+            await email_service.stop()
+            pool.shutdown(wait=True)
+            if token_cache is not None:
+                await token_cache.aclose()
 
 
 def create_app() -> FastAPI:
@@ -58,53 +113,60 @@ def create_app() -> FastAPI:
         lifespan=lifespan
     )
     
-    # Configure CORS
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],  # In production, specify allowed origins
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    # Configure CORS only for browser clients; MCP and API clients skip the middleware entirely
+    allowed_origins = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()]
+    if allowed_origins:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=allowed_origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
     
     # Register API routes
     app.include_router(email_router)
     
     # Setup MCP integration
     global _mcp_instance
-    _mcp_instance = FastMCP(
-        "Gmail MCP Server",
-        streamable_http_path="/",
-        json_response=True,
-        stateless_http=True,
-    )
-    
-    setup_mcp_tools(_mcp_instance)
-    mcp_app = _mcp_instance.streamable_http_app()
-    app.mount("/mcp", mcp_app)
-    
-    logger.info("MCP server mounted at /mcp")
+    if ENABLE_MCP:
+        _mcp_instance = FastMCP(
+            "Gmail MCP Server",
+            streamable_http_path="/",
+            json_response=True,
+            stateless_http=True,
+        )
+        
+        setup_mcp_tools(_mcp_instance)
+        mcp_app = _mcp_instance.streamable_http_app()
+        app.mount("/mcp", mcp_app)
+        
+        logger.info("MCP server mounted at /mcp")
+    else:
+        logger.info("MCP server disabled (ENABLE_MCP=%s)", os.getenv("ENABLE_MCP"))
     
     # Root endpoint
     @app.get("/")
-    async def root():
+    async def root() -> dict:
         """Root endpoint with API information."""
+        endpoints = {
+            "send_email": "/api/v1/send-email",
+            "health": "/api/v1/health",
+            "docs": "/docs"
+        }
+        if ENABLE_MCP:
+            endpoints["mcp"] = "/mcp"
         return {
             "message": "Gmail MCP Server",
             "version": "1.0.0",
-            "endpoints": {
-                "send_email": "/api/v1/send-email",
-                "health": "/api/v1/health",
-                "mcp": "/mcp",
-                "docs": "/docs"
-            }
+            "endpoints": endpoints
         }
     
     # Health check endpoint
-    @app.get("/health")
+    @app.get("/health", response_model=HealthResponse)
     async def health():
         """Application health check."""
-        return {"status": "healthy", "service": "gmail-mcp-server"}
+        return health_response("gmail-mcp-server")
     
     logger.info("Application created successfully")
     return app
@@ -114,12 +176,22 @@ app = create_app()
 
 
 def main():
-    """Main entry point for running the application."""
+    """
+    Main entry point for running the application.
+    
+    Runs a single auto-reloading process when ENV=dev, otherwise WEB_CONCURRENCY
+    worker processes (2 * CPU + 1 by default).
+    """
+    dev = os.getenv("ENV") == "dev"
+    workers = None if dev else int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
     uvicorn.run(
         "main:app",
         host="127.0.0.1",
         port=8000,
-        reload=True,
+        reload=dev,
+        workers=workers,
+        loop=EVENT_LOOP,
+        http="httptools",
         log_level="info"
     )
 
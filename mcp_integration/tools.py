@@ -2,7 +2,9 @@
 
 import logging
 from mcp.server.fastmcp import FastMCP
-from services.email_service import EmailService
+from pydantic import ValidationError
+from models.email_models import EmailRequest
+from services.deps import get_email_service
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +16,10 @@ def setup_mcp_tools(mcp: FastMCP) -> None:
     Args:
         mcp: FastMCP instance to register tools with
     """
-    email_service = EmailService()
+    email_service = get_email_service()
     
     @mcp.tool()
-    def send_email_tool(
+    async def send_email_tool(
         to_email: str,
         subject: str,
         body: str,
@@ -36,12 +38,18 @@ def setup_mcp_tools(mcp: FastMCP) -> None:
             Success or error message
         """
         try:
-            result = email_service.send_email(to_email, subject, body, is_html)
-            if result['success']:
-                return result['message']
+            request = EmailRequest(to_email=to_email, subject=subject, body=body, is_html=is_html)
+        except ValidationError as e:
+            errors = '; '.join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            return f"Error: Invalid email request: {errors}"
+        
+        try:
+            result = await email_service.send_email(**request.model_dump(mode='json'))
+            if result.success:
+                return result.message
             else:
-                logger.error(f"MCP tool send_email failed: {result['message']}")
-                return f"Error: {result['message']}"
+                logger.error("MCP tool send_email failed: %s", result.message)
+                return f"Error: {result.message}"
         except Exception as e:
             error_msg = f"Unexpected error in MCP tool: {str(e)}"
             logger.error(error_msg, exc_info=True)
@@ -1,6 +1,6 @@
 """Models package for data validation and serialization."""
 
-from models.email_models import EmailRequest, EmailResponse
+from models.email_models import EmailRequest, EmailResponse, HealthResponse
 
-__all__ = ["EmailRequest", "EmailResponse"]
+__all__ = ["EmailRequest", "EmailResponse", "HealthResponse"]
 
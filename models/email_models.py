@@ -1,6 +1,6 @@
 """Email-related Pydantic models for request/response validation."""
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional
 
 
@@ -12,9 +12,11 @@ class EmailRequest(BaseModel):
     body: str
     is_html: Optional[bool] = False
     
-    class Config:
-        """Pydantic configuration."""
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        str_strip_whitespace=True,
+        str_min_length=1,
+        json_schema_extra={
             "example": {
                 "to_email": "recipient@example.com",
                 "subject": "Test Email",
@@ -22,6 +24,7 @@ class EmailRequest(BaseModel):
                 "is_html": False
             }
         }
+    )
 
 
 class EmailResponse(BaseModel):
@@ -32,9 +35,8 @@ class EmailResponse(BaseModel):
     subject: Optional[str] = None
     message_id: Optional[str] = None
     
-    class Config:
-        """Pydantic configuration."""
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": True,
                 "message": "Email sent successfully to recipient@example.com",
@@ -42,4 +44,11 @@ class EmailResponse(BaseModel):
                 "message_id": "1234567890"
             }
         }
+    )
 
+
+class HealthResponse(BaseModel):
+    """Response model for health check endpoints."""
+    
+    status: str
+    service: str
@@ -1,7 +1,8 @@
 """Services package for business logic."""
 
 from services.email_service import EmailService
-from services.gmail_service import GmailService
+from services.gmail_service import GmailService, SendResult, get_gmail_service
+from services.deps import get_email_service
 
-__all__ = ["EmailService", "GmailService"]
+__all__ = ["EmailService", "GmailService", "SendResult", "get_email_service", "get_gmail_service"]
 
@@ -0,0 +1,15 @@
+"""Dependency providers for sharing service instances across HTTP and MCP paths."""
+
+from functools import lru_cache
+from services.email_service import EmailService
+
+
+@lru_cache(maxsize=1)
+def get_email_service() -> EmailService:
+    """
+    Get the process-wide email service instance.
+    
+    Returns:
+        Shared EmailService instance
+    """
+    return EmailService()
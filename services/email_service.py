@@ -1,34 +1,88 @@
 """Email service for business logic and orchestration."""
 
+import os
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from services.gmail_service import GmailService
+from dataclasses import replace
+from typing import List, Optional, Set, Tuple
+from services.gmail_service import GmailService, SendResult, get_gmail_service
 
 logger = logging.getLogger(__name__)
 
+# Outbound batching knobs: flush once this many sends are queued or the oldest has waited this long
+BATCH_SIZE = int(os.getenv('GMAIL_BATCH_SIZE', '50'))
+MAX_WAIT_MS = int(os.getenv('GMAIL_BATCH_MAX_WAIT_MS', '50'))
+
+# Queue item telling the collector to send its open batch and exit
+_STOP = object()
+
 
 class EmailService:
     """Service for email operations and business logic."""
     
-    def __init__(self, gmail_service: Optional[GmailService] = None):
+    def __init__(
+        self,
+        gmail_service: Optional[GmailService] = None,
+        batch_size: int = BATCH_SIZE,
+        max_wait_ms: int = MAX_WAIT_MS
+    ):
         """
         Initialize email service.
         
         Args:
-            gmail_service: Gmail service instance (creates new one if not provided)
+            gmail_service: Gmail service instance (uses the shared one if not provided)
+            batch_size: Maximum number of messages sent in one Gmail batch request
+            max_wait_ms: Longest time a queued message waits for a batch to fill
         """
-        self.gmail_service = gmail_service or GmailService()
+        self.gmail_service = gmail_service or get_gmail_service()
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
     
-    def send_email(
+    async def start(self) -> None:
+        """Start the background task that batches outbound messages."""
+        if self._collector is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect_batches(self._queue))
+        logger.info('Email batching started (batch_size=%s, max_wait_ms=%s)', self.batch_size, self.max_wait_ms)
+    
+    async def stop(self) -> None:
+        """Stop batching, sending anything still queued before returning."""
+        if self._collector is None:
+            return
+        # New sends go straight to Gmail from here on
+        queue, self._queue = self._queue, None
+        
+        # The collector sends its open batch when it reaches the sentinel, so nothing it holds is dropped
+        await queue.put(_STOP)
+        await self._collector
+        
+        pending = []
+        while not queue.empty():
+            pending.append(queue.get_nowait())
+        if pending:
+            await self._flush(pending)
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+        
+        self._collector = None
+        logger.info('Email batching stopped')
+    
+    async def send_email(
         self,
         to_email: str,
         subject: str,
         body: str,
         is_html: bool = False
-    ) -> Dict[str, Any]:
+    ) -> SendResult:
         """
         Send an email using Gmail API.
         
+        Inputs are expected to be validated and stripped already (see EmailRequest).
+        
         Args:
             to_email: Recipient email address
             subject: Email subject line
@@ -36,49 +90,76 @@ class EmailService:
             is_html: Whether the body is HTML formatted
         
         Returns:
-            Dictionary with 'success' (bool), 'message' (str), and optional 'message_id' (str)
+            SendResult with success flag, message and optional Gmail message ID
         """
         try:
-            # Validate inputs
-            if not to_email or not to_email.strip():
-                return {
-                    'success': False,
-                    'message': 'Recipient email address is required'
-                }
-            
-            if not subject or not subject.strip():
-                return {
-                    'success': False,
-                    'message': 'Email subject is required'
-                }
-            
-            if not body or not body.strip():
-                return {
-                    'success': False,
-                    'message': 'Email body is required'
-                }
-            
             # Create message
             message = self.gmail_service.create_message(
-                to_email=to_email.strip(),
-                subject=subject.strip(),
-                body=body.strip(),
+                to_email=to_email,
+                subject=subject,
+                body=body,
                 is_html=is_html
             )
             
-            # Send message
-            result = self.gmail_service.send_message(message)
+            # Send message, through the batch collector when it is running
+            if self._queue is None:
+                result = await self.gmail_service.send_message(message)
+            else:
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put((message, future))
+                result = await future
             
-            if result['success']:
-                result['message'] = f"Email sent successfully to {to_email}"
+            if result.success:
+                result = replace(result, message=f"Email sent successfully to {to_email}")
             
             return result
             
         except Exception as e:
             error_msg = f'Unexpected error in email service: {str(e)}'
             logger.error(error_msg, exc_info=True)
-            return {
-                'success': False,
-                'message': error_msg
-            }
-
+            return SendResult(False, error_msg)
+    
+    async def _collect_batches(self, queue: asyncio.Queue) -> None:
+        """Drain the queue into batches bounded by batch_size and max_wait_ms until the stop sentinel."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            
+            batch = [item]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+    
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        """Send one batch and resolve each caller's future with its own result."""
+        messages = [message for message, _ in batch]
+        try:
+            if len(messages) == 1:
+                results = [await self.gmail_service.send_message(messages[0])]
+            else:
+                results = await self.gmail_service.send_batch(messages)
+        except Exception as e:
+            error_msg = f'Unexpected error sending email batch: {str(e)}'
+            logger.error(error_msg, exc_info=True)
+            results = [SendResult(False, error_msg)] * len(messages)
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
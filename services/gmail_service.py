@@ -1,57 +1,154 @@
 """Gmail API service for authentication and email operations."""
 
 import os
+import re
+import json
+import time
+import uuid
 import base64
+import asyncio
+import tempfile
 import logging
-from typing import Optional
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
 from email.mime.text import MIMEText
-from google.auth.transport.requests import Request
+import httpx
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from redis.asyncio import Redis
 
 logger = logging.getLogger(__name__)
 
 # Gmail API scopes
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Gmail REST endpoint for sending messages
+GMAIL_SEND_URL = 'https://gmail.googleapis.com/gmail/v1/users/me/messages/send'
+
+# Gmail batch endpoint and the per-part request line for message sends
+GMAIL_BATCH_URL = 'https://www.googleapis.com/batch/gmail/v1'
+GMAIL_BATCH_SEND_PATH = '/gmail/v1/users/me/messages/send'
+
+# Seconds before token expiry at which cached credentials are reloaded
+TOKEN_REFRESH_MARGIN = 60
+
+# Redis key holding the most recently refreshed token, shared by all workers
+TOKEN_CACHE_KEY = 'gmail:token'
+
+# Fixed MIME headers that follow To/Subject in fast-path messages
+_PLAIN_ENVELOPE = (
+    'MIME-Version: 1.0\r\n'
+    'Content-Type: text/plain; charset=utf-8\r\n'
+    'Content-Transfer-Encoding: 8bit\r\n'
+    '\r\n'
+)
+_HTML_ENVELOPE = _PLAIN_ENVELOPE.replace('text/plain', 'text/html')
+
+# Seconds a file existence check is reused before hitting the filesystem again
+STAT_CACHE_TTL = 5
+
+
+@dataclass(slots=True, frozen=True)
+class SendResult:
+    """Outcome of a single email send."""
+    
+    success: bool
+    message: str
+    message_id: Optional[str] = None
+
+
+AUTH_FAILED_RESULT = SendResult(False, 'Failed to authenticate with Gmail. Please run test_gmail_auth.py first.')
+
 
 class GmailService:
     """Service for interacting with Gmail API."""
     
-    def __init__(self, token_file: str = 'token.json', credentials_file: str = 'credentials.json'):
+    def __init__(
+        self,
+        token_file: str = 'token.json',
+        credentials_file: str = 'credentials.json',
+        http_client: Optional[httpx.AsyncClient] = None,
+        executor: Optional[Executor] = None,
+        token_cache: Optional[Redis] = None
+    ):
         """
         Initialize Gmail service.
         
         Args:
             token_file: Path to OAuth token file
             credentials_file: Path to OAuth credentials file
+            http_client: Shared async HTTP client (a short-lived one is used per call if not provided)
+            executor: Thread pool for blocking token file I/O (the loop's default pool if not provided)
+            token_cache: Redis client for sharing refreshed tokens across workers (token file only if not provided)
         """
         self.token_file = token_file
         self.credentials_file = credentials_file
-        self._service: Optional[object] = None
+        self.http_client = http_client
+        self.executor = executor
+        self.token_cache = token_cache
+        self._creds: Optional[Credentials] = None
+        self._refresh_at = 0.0
+        self._auth_header: Optional[bytes] = None
+        self._refresh_lock = asyncio.Lock()
+        self._rejected_token: Optional[str] = None
     
-    def get_service(self) -> Optional[object]:
+    async def get_credentials(self) -> Optional[Credentials]:
         """
-        Get authenticated Gmail service instance.
+        Get valid OAuth credentials, reloading them only when the cached token is near expiry.
+        
+        Reloading is single-flight per process: one coroutine checks the shared token cache,
+        falls back to the token file and refreshes, while concurrent callers wait and reuse its result.
         
         Returns:
-            Gmail service object or None if authentication fails
+            Credentials object or None if authentication fails
         """
-        if self._service is not None:
-            return self._service
+        if self._creds is not None and time.monotonic() < self._refresh_at:
+            return self._creds
         
-        creds = self._load_credentials()
-        if not creds:
-            return None
+        async with self._refresh_lock:
+            # Another send may have reloaded the token while this one waited for the lock
+            if self._creds is not None and time.monotonic() < self._refresh_at:
+                return self._creds
+            
+            creds = await self._get_shared_credentials()
+            if creds is not None and creds.token == self._rejected_token:
+                creds = None
+            if creds is None:
+                creds = await self._run_blocking(self._load_credentials)
+                # Gmail may reject a token before its expiry (e.g. revoked), so refresh that one too
+                if creds and (not creds.valid or creds.token == self._rejected_token):
+                    creds = await self._refresh_credentials(creds)
+                if creds:
+                    await self._set_shared_credentials(creds)
+            self._creds = creds
+            # Encode the Authorization header once per token rather than once per send
+            self._auth_header = b'Bearer ' + creds.token.encode('ascii') if creds else None
+            if creds is None:
+                self._refresh_at = 0.0
+            elif creds.expiry is None:
+                self._refresh_at = float('inf')
+            else:
+                remaining = (creds.expiry - _utcnow()).total_seconds()
+                self._refresh_at = time.monotonic() + remaining - TOKEN_REFRESH_MARGIN
+        return creds
+    
+    def _invalidate_credentials(self, auth_header: Optional[bytes]) -> None:
+        """
+        Drop a token Gmail rejected so the next get_credentials call refreshes it.
         
-        try:
-            self._service = build('gmail', 'v1', credentials=creds)
-            logger.info('Gmail service initialized successfully')
-            return self._service
-        except HttpError as error:
-            logger.error(f'Error building Gmail service: {error}')
-            return None
+        Args:
+            auth_header: Authorization header the rejected request was sent with
+        """
+        # Another send may already have replaced the rejected token
+        if self._auth_header != auth_header:
+            return
+        logger.warning('Gmail rejected the access token; it will be refreshed')
+        self._rejected_token = self._creds.token if self._creds else None
+        self._creds = None
+        self._refresh_at = 0.0
+        self._auth_header = None
     
     def check_authentication_status(self) -> dict:
         """
@@ -62,8 +159,8 @@ class GmailService:
         """
         status = {
             'authenticated': False,
-            'credentials_file_exists': os.path.exists(self.credentials_file),
-            'token_file_exists': os.path.exists(self.token_file),
+            'credentials_file_exists': _path_exists(self.credentials_file),
+            'token_file_exists': _path_exists(self.token_file),
             'message': '',
             'instructions': []
         }
@@ -88,10 +185,8 @@ class GmailService:
             return status
         
         # Try to load credentials
-        creds = None
         try:
-            if os.path.exists(self.token_file):
-                creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
+            creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
         except Exception as e:
             status['message'] = f'Error loading token.json: {str(e)}'
             status['instructions'] = [
@@ -116,59 +211,164 @@ class GmailService:
     
     def _load_credentials(self) -> Optional[Credentials]:
         """
-        Load and refresh OAuth credentials.
+        Load OAuth credentials from the token file.
         
         Returns:
-            Credentials object or None if authentication fails
+            Credentials object (possibly expired but refreshable) or None if authentication fails
         """
         creds = None
+        token_exists = _path_exists(self.token_file)
         
         # Check if credentials.json exists
-        if not os.path.exists(self.credentials_file):
+        if not _path_exists(self.credentials_file):
             logger.error(
-                f'credentials.json not found at {self.credentials_file}. '
-                'Please download it from Google Cloud Console and place it in the project root.'
+                'credentials.json not found at %s. '
+                'Please download it from Google Cloud Console and place it in the project root.',
+                self.credentials_file
             )
             return None
         
         # Load existing token
-        if os.path.exists(self.token_file):
+        if token_exists:
             try:
                 creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
             except Exception as e:
-                logger.error(f'Error loading credentials from {self.token_file}: {e}')
+                logger.error('Error loading credentials from %s: %s', self.token_file, e)
                 logger.info('Token file may be corrupted. Please run test_gmail_auth.py to regenerate it.')
                 return None
         
-        # If there are no (valid) credentials available, return None
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    logger.info('Refreshing expired token...')
-                    creds.refresh(Request())
-                    self._save_credentials(creds)
-                    logger.info('Token refreshed successfully')
-                except Exception as e:
-                    logger.error(f'Error refreshing token: {e}')
-                    logger.info('Please run test_gmail_auth.py to re-authenticate.')
-                    return None
-            else:
-                logger.warning(
-                    f'No valid credentials found. Token file exists: {os.path.exists(self.token_file)}. '
-                    f'Please run: python test_gmail_auth.py'
-                )
-                return None
+        # If there are no valid or refreshable credentials available, return None
+        if not creds or not (creds.valid or (creds.expired and creds.refresh_token)):
+            logger.warning(
+                'No valid credentials found. Token file exists: %s. '
+                'Please run: python test_gmail_auth.py',
+                token_exists
+            )
+            return None
         
         return creds
     
+    async def _refresh_credentials(self, creds: Credentials) -> Optional[Credentials]:
+        """
+        Refresh an expired access token through the shared HTTP client.
+        
+        Args:
+            creds: Expired credentials holding a refresh token
+        
+        Returns:
+            Refreshed credentials or None if the refresh fails
+        """
+        try:
+            logger.info('Refreshing expired token...')
+            response = await self._post(creds.token_uri, data={
+                'grant_type': 'refresh_token',
+                'client_id': creds.client_id,
+                'client_secret': creds.client_secret,
+                'refresh_token': creds.refresh_token,
+            })
+            response.raise_for_status()
+            payload = response.json()
+            
+            creds.token = payload['access_token']
+            creds.expiry = _utcnow() + timedelta(seconds=payload['expires_in'])
+            await self._run_blocking(self._save_credentials, creds)
+            logger.info('Token refreshed successfully')
+            return creds
+        except Exception as e:
+            logger.error('Error refreshing token: %s', e)
+            logger.info('Please run test_gmail_auth.py to re-authenticate.')
+            return None
+    
+    async def _get_shared_credentials(self) -> Optional[Credentials]:
+        """
+        Load a still-valid token another worker stored in the shared token cache.
+        
+        Returns:
+            Credentials object or None on a cache miss, an unusable entry or a Redis error
+        """
+        if self.token_cache is None:
+            return None
+        
+        try:
+            cached = await self.token_cache.get(TOKEN_CACHE_KEY)
+            if not cached:
+                return None
+            creds = Credentials.from_authorized_user_info(json.loads(cached), SCOPES)
+        except Exception as e:
+            logger.warning('Error reading shared token cache: %s', e)
+            return None
+        
+        return creds if creds.valid else None
+    
+    async def _set_shared_credentials(self, creds: Credentials) -> None:
+        """Publish credentials to the shared token cache until the token expires."""
+        if self.token_cache is None:
+            return
+        
+        ttl = None
+        if creds.expiry is not None:
+            ttl = int((creds.expiry - _utcnow()).total_seconds())
+            if ttl <= 0:
+                return
+        
+        try:
+            await self.token_cache.set(TOKEN_CACHE_KEY, creds.to_json(), ex=ttl)
+        except Exception as e:
+            logger.warning('Error writing shared token cache: %s', e)
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the executor so it does not stall the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+    
+    async def _post_authorized(self, url: str, headers: Optional[dict] = None, **kwargs) -> Optional[httpx.Response]:
+        """
+        POST to a Gmail endpoint with the bearer token, refreshing and retrying once if Gmail rejects it.
+        
+        Args:
+            url: Gmail endpoint URL
+            headers: Extra request headers
+            **kwargs: Remaining arguments for the POST
+        
+        Returns:
+            Response, or None if no valid credentials are available
+        """
+        for attempt in range(2):
+            if not await self.get_credentials():
+                return None
+            auth_header = self._auth_header
+            response = await self._post(url, headers={**(headers or {}), 'Authorization': auth_header}, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
+            self._invalidate_credentials(auth_header)
+        return response
+    
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        """POST through the shared HTTP client, or a short-lived one if none is configured."""
+        if self.http_client is not None:
+            return await self.http_client.post(url, **kwargs)
+        async with httpx.AsyncClient() as client:
+            return await client.post(url, **kwargs)
+    
     def _save_credentials(self, creds: Credentials) -> None:
-        """Save credentials to token file."""
+        """Save credentials to token file atomically, so a crash mid-write never leaves it corrupted."""
+        # A unique temp file per save, so concurrent saves (threads or workers) never share one
+        tmp_file = None
         try:
-            with open(self.token_file, 'w') as token:
+            fd, tmp_file = tempfile.mkstemp(
+                dir=os.path.dirname(self.token_file) or '.',
+                prefix=f'{os.path.basename(self.token_file)}.',
+                suffix='.tmp'
+            )
+            with os.fdopen(fd, 'w') as token:
                 token.write(creds.to_json())
-            logger.info(f'Credentials saved to {self.token_file}')
+                token.flush()
+                os.fsync(token.fileno())
+            os.replace(tmp_file, self.token_file)
+            logger.info('Credentials saved to %s', self.token_file)
         except Exception as e:
-            logger.error(f'Error saving credentials: {e}')
+            logger.error('Error saving credentials: %s', e)
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
     
     def create_message(self, to_email: str, subject: str, body: str, is_html: bool = False) -> dict:
         """
@@ -183,19 +383,23 @@ class GmailService:
         Returns:
             Dictionary with 'raw' key containing base64-encoded message
         """
-        if is_html:
-            message = MIMEText(body, 'html')
+        if _is_plain_header(to_email) and _is_plain_header(subject):
+            # Fast path: write the RFC 5322 envelope directly instead of running the email generator.
+            # Headers are ASCII here, so the whole message is built and encoded in one step.
+            envelope = _HTML_ENVELOPE if is_html else _PLAIN_ENVELOPE
+            raw = f'To: {to_email}\r\nSubject: {subject}\r\n{envelope}{body}'.encode('utf-8')
         else:
-            message = MIMEText(body, 'plain')
-        
-        message['to'] = to_email
-        message['subject'] = subject
+            # Non-ASCII or unusual headers need RFC 2047 encoding and folding
+            message = MIMEText(body, 'html' if is_html else 'plain')
+            message['to'] = to_email
+            message['subject'] = subject
+            raw = message.as_bytes()
         
         # Encode the message
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
+        raw_message = base64.urlsafe_b64encode(raw).decode('ascii')
         return {'raw': raw_message}
     
-    def send_message(self, message: dict) -> dict:
+    async def send_message(self, message: dict) -> SendResult:
         """
         Send a message via Gmail API.
         
@@ -203,41 +407,159 @@ class GmailService:
             message: Message dictionary with 'raw' key
         
         Returns:
-            Dictionary with 'success' (bool), 'message' (str), and optional 'message_id' (str)
+            SendResult with success flag, message and optional Gmail message ID
         """
-        service = self.get_service()
-        if not service:
-            return {
-                'success': False,
-                'message': 'Failed to authenticate with Gmail. Please run test_gmail_auth.py first.'
-            }
-        
         try:
-            sent_message = service.users().messages().send(
-                userId='me',
-                body=message
-            ).execute()
+            response = await self._post_authorized(GMAIL_SEND_URL, json=message)
+            if response is None:
+                return AUTH_FAILED_RESULT
+            response.raise_for_status()
             
-            message_id = sent_message.get('id')
-            logger.info(f'Email sent successfully. Message ID: {message_id}')
+            message_id = _message_id(response.text)
+            logger.info('Email sent successfully. Message ID: %s', message_id)
             
-            return {
-                'success': True,
-                'message': 'Email sent successfully',
-                'message_id': message_id
-            }
-        except HttpError as error:
-            error_msg = f'Gmail API error: {error}'
+            return SendResult(True, 'Email sent successfully', message_id)
+        except httpx.HTTPStatusError as error:
+            error_msg = f'Gmail API error: {error.response.status_code} {error.response.text}'
             logger.error(error_msg)
-            return {
-                'success': False,
-                'message': error_msg
-            }
+            return SendResult(False, error_msg)
         except Exception as e:
             error_msg = f'Unexpected error sending email: {str(e)}'
             logger.error(error_msg)
-            return {
-                'success': False,
-                'message': error_msg
-            }
+            return SendResult(False, error_msg)
+    
+    async def send_batch(self, messages: List[dict]) -> List[SendResult]:
+        """
+        Send several messages in a single Gmail API batch request.
+        
+        Args:
+            messages: Message dictionaries with 'raw' key
+        
+        Returns:
+            One SendResult per message, in the same order
+        """
+        boundary = f'batch_{uuid.uuid4().hex}'
+        parts = []
+        for index, message in enumerate(messages):
+            parts.append(
+                f'--{boundary}\r\n'
+                'Content-Type: application/http\r\n'
+                f'Content-ID: <item{index}>\r\n'
+                '\r\n'
+                f'POST {GMAIL_BATCH_SEND_PATH}\r\n'
+                'Content-Type: application/json\r\n'
+                '\r\n'
+                f'{json.dumps(message)}\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n')
+        headers = {'Content-Type': f'multipart/mixed; boundary={boundary}'}
+        
+        try:
+            response = await self._post_authorized(
+                GMAIL_BATCH_URL, headers=headers, content=''.join(parts).encode('utf-8')
+            )
+            if response is None:
+                return [AUTH_FAILED_RESULT] * len(messages)
+            response.raise_for_status()
+            responses = _parse_batch_response(response.headers.get('content-type', ''), response.text)
+        except httpx.HTTPStatusError as error:
+            error_msg = f'Gmail API error: {error.response.status_code} {error.response.text}'
+            logger.error(error_msg)
+            return [SendResult(False, error_msg)] * len(messages)
+        except Exception as e:
+            error_msg = f'Unexpected error sending email batch: {str(e)}'
+            logger.error(error_msg)
+            return [SendResult(False, error_msg)] * len(messages)
+        
+        results = []
+        for index in range(len(messages)):
+            status_code, body = responses.get(f'response-item{index}', (None, ''))
+            if status_code is not None and 200 <= status_code < 300:
+                message_id = _message_id(body)
+                logger.info('Email sent successfully. Message ID: %s', message_id)
+                results.append(SendResult(True, 'Email sent successfully', message_id))
+            elif status_code is None:
+                error_msg = f'Gmail API error: no usable response for message {index} in batch'
+                logger.error(error_msg)
+                results.append(SendResult(False, error_msg))
+            else:
+                error_msg = f'Gmail API error: {status_code} {body}'
+                logger.error(error_msg)
+                results.append(SendResult(False, error_msg))
+        
+        return results
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching google-auth's Credentials.expiry."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _path_exists(path: str) -> bool:
+    """Check whether a path exists, reusing the answer for up to STAT_CACHE_TTL seconds."""
+    return _path_exists_in_window(path, int(time.monotonic() // STAT_CACHE_TTL))
+
+
+@lru_cache(maxsize=32)
+def _path_exists_in_window(path: str, window: int) -> bool:
+    """Stat a path once per cache window."""
+    return os.path.exists(path)
+
 
+def _is_plain_header(value: str) -> bool:
+    """Check whether a header value can be written verbatim: ASCII, one line, well under the 998-character line limit."""
+    return value.isascii() and len(value) <= 900 and '\r' not in value and '\n' not in value
+
+
+def _message_id(body: str) -> Optional[str]:
+    """Extract the Gmail message ID from a send response body, or None if it has none."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    return payload.get('id') if isinstance(payload, dict) else None
+
+
+def _parse_batch_response(content_type: str, text: str) -> dict:
+    """
+    Split a multipart/mixed batch response into its embedded HTTP responses.
+    
+    Args:
+        content_type: Content-Type header of the batch response
+        text: Batch response body
+    
+    Returns:
+        Dictionary mapping each part's Content-ID to a (status code or None if unparseable, body) tuple
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not match:
+        raise ValueError(f'Batch response has no multipart boundary: {content_type}')
+    
+    responses = {}
+    for part in text.replace('\r\n', '\n').split(f'--{match.group(1)}'):
+        part = part.strip()
+        if not part or part == '--':
+            continue
+        
+        part_headers, _, embedded = part.partition('\n\n')
+        content_id = re.search(r'^Content-ID:\s*<?([^>\s]+)>?', part_headers, re.IGNORECASE | re.MULTILINE)
+        if not content_id:
+            continue
+        
+        # A malformed part only fails its own message (status None), never the whole batch
+        response_head, _, body = embedded.partition('\n\n')
+        status = re.match(r'HTTP/[\d.]+\s+(\d{3})\b', response_head)
+        responses[content_id.group(1)] = (int(status.group(1)) if status else None, body.strip())
+    
+    return responses
+
+
+@lru_cache(maxsize=1)
+def get_gmail_service() -> GmailService:
+    """
+    Get the process-wide Gmail service instance.
+    
+    Returns:
+        Shared GmailService instance
+    """
+    return GmailService()
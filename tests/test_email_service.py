@@ -0,0 +1,77 @@
+"""Tests for EmailService outbound batching."""
+
+import asyncio
+
+from services.email_service import EmailService
+from services.gmail_service import SendResult
+
+
+class FakeGmailService:
+    """Records what EmailService asks Gmail to send."""
+    
+    def __init__(self):
+        self.batches = []
+    
+    def create_message(self, to_email: str, subject: str, body: str, is_html: bool = False) -> dict:
+        return {'raw': subject}
+    
+    async def send_message(self, message: dict) -> SendResult:
+        self.batches.append([message])
+        return SendResult(True, 'Email sent successfully', message['raw'])
+    
+    async def send_batch(self, messages: list) -> list:
+        self.batches.append(messages)
+        return [SendResult(True, 'Email sent successfully', message['raw']) for message in messages]
+
+
+def test_concurrent_sends_share_one_batch():
+    gmail = FakeGmailService()
+    service = EmailService(gmail_service=gmail, batch_size=10, max_wait_ms=50)
+    
+    async def run():
+        await service.start()
+        results = await asyncio.gather(*[
+            service.send_email('a@example.com', f'subject-{i}', 'body') for i in range(3)
+        ])
+        await service.stop()
+        return results
+    
+    results = asyncio.run(run())
+    
+    assert len(gmail.batches) == 1
+    assert [result.message_id for result in results] == ['subject-0', 'subject-1', 'subject-2']
+
+
+def test_stop_sends_batch_still_waiting_to_fill():
+    gmail = FakeGmailService()
+    service = EmailService(gmail_service=gmail, batch_size=10, max_wait_ms=1000)
+    
+    async def run():
+        await service.start()
+        sends = [
+            asyncio.create_task(service.send_email('a@example.com', f'subject-{i}', 'body'))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        await service.stop()
+        return await asyncio.wait_for(asyncio.gather(*sends), timeout=1)
+    
+    results = asyncio.run(run())
+    
+    assert all(result.success for result in results)
+    assert sum(len(batch) for batch in gmail.batches) == 3
+
+
+def test_sends_after_stop_go_directly_to_gmail():
+    gmail = FakeGmailService()
+    service = EmailService(gmail_service=gmail)
+    
+    async def run():
+        await service.start()
+        await service.stop()
+        return await service.send_email('a@example.com', 'late', 'body')
+    
+    result = asyncio.run(run())
+    
+    assert result.message_id == 'late'
+    assert gmail.batches == [[{'raw': 'late'}]]
@@ -0,0 +1,219 @@
+"""Tests for GmailService credential handling."""
+
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from services.gmail_service import GmailService, _parse_batch_response
+
+
+def _write_token(path, expiry: datetime) -> None:
+    """Write a token.json with the given (UTC) expiry."""
+    path.write_text(json.dumps({
+        'token': 'old-token',
+        'refresh_token': 'refresh',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'client_id': 'client',
+        'client_secret': 'secret',
+        'scopes': ['https://www.googleapis.com/auth/gmail.send'],
+        'expiry': expiry.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+    }))
+
+
+@pytest.fixture
+def expired_service(tmp_path):
+    """GmailService with an expired token and a mock transport that counts token refreshes."""
+    (tmp_path / 'credentials.json').write_text('{"installed": {}}')
+    token_file = tmp_path / 'token.json'
+    _write_token(token_file, datetime.now(timezone.utc) - timedelta(hours=1))
+    
+    calls = {'refresh': 0}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls['refresh'] += 1
+        return httpx.Response(200, json={'access_token': 'new-token', 'expires_in': 3599})
+    
+    service = GmailService(
+        token_file=str(token_file),
+        credentials_file=str(tmp_path / 'credentials.json'),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    return service, calls, token_file
+
+
+def test_concurrent_sends_refresh_token_once(expired_service):
+    service, calls, token_file = expired_service
+    
+    async def run():
+        return await asyncio.gather(*[service.get_credentials() for _ in range(10)])
+    
+    results = asyncio.run(run())
+    
+    assert calls['refresh'] == 1
+    assert all(creds.token == 'new-token' for creds in results)
+    assert json.loads(token_file.read_text())['token'] == 'new-token'
+
+
+def test_concurrent_saves_leave_valid_token_file(expired_service):
+    service, _, token_file = expired_service
+    creds = service._load_credentials()
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: service._save_credentials(creds), range(64)))
+    
+    assert json.loads(token_file.read_text())['refresh_token'] == 'refresh'
+    assert [path.name for path in token_file.parent.iterdir() if path.suffix == '.tmp'] == []
+
+
+class FakeTokenCache:
+    """In-memory stand-in for the redis.asyncio client that counts calls."""
+    
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.sets = 0
+    
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+    
+    async def set(self, key, value, ex=None):
+        self.sets += 1
+        self.data[key] = value
+
+
+def test_shared_token_cache_used_once_per_worker_refresh(expired_service):
+    service, calls, token_file = expired_service
+    cache = FakeTokenCache()
+    service.token_cache = cache
+    other_worker = GmailService(
+        token_file=service.token_file,
+        credentials_file=service.credentials_file,
+        http_client=service.http_client,
+        token_cache=cache,
+    )
+    
+    async def run():
+        await asyncio.gather(*[service.get_credentials() for _ in range(10)])
+        return await asyncio.gather(*[other_worker.get_credentials() for _ in range(10)])
+    
+    results = asyncio.run(run())
+    
+    assert calls['refresh'] == 1
+    assert (cache.gets, cache.sets) == (2, 1)
+    assert all(creds.token == 'new-token' for creds in results)
+
+
+def test_parse_batch_response_maps_parts_by_content_id():
+    body = (
+        '--batch_abc123\r\n'
+        'Content-Type: application/http\r\n'
+        'Content-ID: <response-item0>\r\n'
+        '\r\n'
+        'HTTP/1.1 200 OK\r\n'
+        'Content-Type: application/json; charset=UTF-8\r\n'
+        'Vary: Origin\r\n'
+        'Vary: X-Origin\r\n'
+        '\r\n'
+        '{\n  "id": "18c0ffee",\n  "threadId": "18c0ffee",\n  "labelIds": ["SENT"]\n}\n'
+        '\r\n'
+        '--batch_abc123\r\n'
+        'Content-Type: application/http\r\n'
+        'Content-ID: <response-item1>\r\n'
+        '\r\n'
+        'HTTP/1.1 400 Bad Request\r\n'
+        'Content-Type: application/json; charset=UTF-8\r\n'
+        '\r\n'
+        '{\n  "error": {\n    "code": 400,\n    "message": "Invalid To header"\n  }\n}\n'
+        '\r\n'
+        '--batch_abc123--\r\n'
+    )
+    
+    responses = _parse_batch_response('multipart/mixed; boundary=batch_abc123', body)
+    
+    assert set(responses) == {'response-item0', 'response-item1'}
+    status, payload = responses['response-item0']
+    assert status == 200 and json.loads(payload)['id'] == '18c0ffee'
+    status, payload = responses['response-item1']
+    assert status == 400 and json.loads(payload)['error']['message'] == 'Invalid To header'
+
+
+def test_send_batch_returns_one_result_per_message(expired_service):
+    service, _, _ = expired_service
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        if 'oauth2' in str(request.url):
+            return httpx.Response(200, json={'access_token': 'new-token', 'expires_in': 3599})
+        assert request.headers['authorization'] == 'Bearer new-token'
+        body = ''.join(
+            f'--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item{i}>\r\n\r\n'
+            f'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{{"id": "m{i}"}}\r\n'
+            for i in (1, 0)
+        ) + '--resp--\r\n'
+        return httpx.Response(200, text=body, headers={'content-type': 'multipart/mixed; boundary="resp"'})
+    
+    service.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results = asyncio.run(service.send_batch([{'raw': 'a'}, {'raw': 'b'}]))
+    
+    assert [result.message_id for result in results] == ['m0', 'm1']
+
+
+def test_send_batch_fails_only_malformed_parts(expired_service):
+    service, _, _ = expired_service
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        if 'oauth2' in str(request.url):
+            return httpx.Response(200, json={'access_token': 'new-token', 'expires_in': 3599})
+        body = (
+            '--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item0>\r\n\r\n'
+            'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{"id": "m0"}\r\n'
+            '--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item1>\r\n\r\n'
+            'HTTP/1.1 204 No Content\r\n\r\n\r\n'
+            '--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item2>\r\n\r\n'
+            'garbage without a status line\r\n'
+            '--resp\r\nContent-Type: application/http\r\nContent-ID: <response-item3>\r\n\r\n'
+            'HTTP/1.1 200 OK\r\n\r\nnot json\r\n'
+            '--resp--\r\n'
+        )
+        return httpx.Response(200, text=body, headers={'content-type': 'multipart/mixed; boundary=resp'})
+    
+    service.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results = asyncio.run(service.send_batch([{'raw': str(i)} for i in range(5)]))
+    
+    assert [(result.success, result.message_id) for result in results] == [
+        (True, 'm0'), (True, None), (False, None), (True, None), (False, None)
+    ]
+
+
+def test_rejected_token_is_refreshed_and_send_retried(tmp_path):
+    (tmp_path / 'credentials.json').write_text('{"installed": {}}')
+    token_file = tmp_path / 'token.json'
+    _write_token(token_file, datetime.now(timezone.utc) + timedelta(hours=1))
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        if 'oauth2' in str(request.url):
+            calls.append('refresh')
+            return httpx.Response(200, json={'access_token': 'new-token', 'expires_in': 3599})
+        calls.append(request.headers['authorization'])
+        if request.headers['authorization'] == 'Bearer old-token':
+            return httpx.Response(401, json={'error': {'code': 401}})
+        return httpx.Response(200, json={'id': 'sent'})
+    
+    service = GmailService(
+        token_file=str(token_file),
+        credentials_file=str(tmp_path / 'credentials.json'),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    
+    async def run():
+        return [await service.send_message({'raw': 'a'}), await service.send_message({'raw': 'b'})]
+    
+    results = asyncio.run(run())
+    
+    assert [result.message_id for result in results] == ['sent', 'sent']
+    assert calls == ['Bearer old-token', 'refresh', 'Bearer new-token', 'Bearer new-token']
@@ -0,0 +1,17 @@
+"""Tests for the pre-serialized health endpoints."""
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_health_endpoints_return_payload_and_keep_schema():
+    client = TestClient(app)
+    
+    assert client.get("/health").json() == {"status": "healthy", "service": "gmail-mcp-server"}
+    assert client.get("/api/v1/health").json() == {"status": "healthy", "service": "email"}
+    
+    paths = client.get("/openapi.json").json()["paths"]
+    for path in ("/health", "/api/v1/health"):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema == {"$ref": "#/components/schemas/HealthResponse"}